@@ -13,6 +13,8 @@ from google.genai.errors import APIError
 
 # --- RL Agent Import ---
 from utils.rl_agent import RLAgent  # Assuming RLAgent is in utils/
+from utils.eligibility import EligibilityIndex
+from utils.sentiment_analyzer import feedback_polarity, record_feedback
 
 app = Flask(__name__)
 
@@ -20,6 +22,8 @@ app = Flask(__name__)
 CVS_PATH = 'data/cvs.csv'
 JDS_PATH = 'data/jds.csv'
 FEEDBACK_LOG_PATH = 'data/feedback_log.csv'  # Optional log for dashboard tracking
+CORPUS_VERSION_PATH = 'data/corpus_version'  # Bumped by utils/ingest.py when CVs are appended
+SENTIMENT_INDEX_PATH = 'data/sentiment_index.csv'  # Per-pair/per-candidate polarity, read by main.py
 
 # --- Initialize RL Agent ---
 try:
@@ -28,6 +32,9 @@ try:
 except FileNotFoundError as e:
     print(f"❌ Error loading data: {e}. Ensure data/cvs.csv and data/jds.csv exist.")
     AGENT = None
+except ValueError as e:
+    print(f"❌ Invalid JD requirements in {JDS_PATH}: {e}")
+    AGENT = None
 
 # --- Initialize Gemini Client ---
 try:
@@ -110,6 +117,29 @@ def send_feedback_to_n8n(candidate_id, jd_id, feedback_score, comment, summary):
         print(f"[N8N ❌] Error sending feedback: {e}")
 
 
+# -----------------------------------------------------------
+# Helper: Pick up CVs appended by utils/ingest.py (no restart needed)
+# -----------------------------------------------------------
+def refresh_agent_cvs():
+    """
+    The ingestion job writes the total cvs.csv row count to CORPUS_VERSION_PATH.
+    If it is ahead of the agent, only the new rows are read and appended.
+    """
+    if not os.path.exists(CORPUS_VERSION_PATH):
+        return
+    try:
+        with open(CORPUS_VERSION_PATH, 'r', encoding='utf-8') as f:
+            corpus_rows = int(f.read().strip() or 0)
+        loaded_rows = len(AGENT.cvs)
+        if corpus_rows > loaded_rows:
+            new_cvs = pd.read_csv(CVS_PATH, skiprows=range(1, loaded_rows + 1), nrows=corpus_rows - loaded_rows)
+            AGENT.cvs = pd.concat([AGENT.cvs, new_cvs], ignore_index=True)
+            AGENT.eligibility = EligibilityIndex(AGENT.cvs, AGENT.jds)
+            print(f"🔄 Loaded {len(new_cvs)} new CVs (corpus now {len(AGENT.cvs)}).")
+    except Exception as e:
+        print(f"⚠️ Failed to refresh CVs: {e}")
+
+
 # -----------------------------------------------------------
 # Route: Home (Simple Health Check)
 # -----------------------------------------------------------
@@ -131,6 +161,8 @@ def update_feedback():
     if not all(key in data for key in required_keys):
         return jsonify({"status": "error", "message": "Missing one or more required fields."}), 400
 
+    refresh_agent_cvs()
+
     # --- Update RL Agent with Feedback ---
     feedback_entry = pd.Series({
         'candidate_id': data['candidate_id'],
@@ -140,6 +172,12 @@ def update_feedback():
     })
     AGENT.update_reward(feedback_entry)
 
+    # --- Update Sentiment Index with Feedback ---
+    try:
+        record_feedback(SENTIMENT_INDEX_PATH, data['candidate_id'], data['jd_id'], feedback_polarity(data['comment']))
+    except Exception as e:
+        print(f"⚠️ Failed to update sentiment index: {e}")
+
     # --- Generate Gemini Summary ---
     summary = summarize_feedback_with_gemini(
         data['candidate_id'],
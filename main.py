@@ -1,15 +1,21 @@
 import os
+import numpy as np
 import pandas as pd
 from utils.matching_engine import compute_similarity
-from utils.sentiment_analyzer import analyze_sentiment
-from utils.rl_agent import train_rl_agent, ACTIONS
+from utils.sentiment_analyzer import SentimentIndex, analyze_sentiment, locked, polarity_label
+from utils.rl_agent import RLAgent, compute_pair_rewards, train_rl_agent
 from utils.decision_engine import make_decision
-from utils.visualization import generate_all_plots
+from utils.eligibility import EligibilityIndex
+from utils.ingest import stored_similarity
+from utils.visualization import start_plot_worker
 
 # Define paths
 CV_DIR = "data/sample_cvs"
 JD_DIR = "data/sample_jds"
 FEEDBACK_FILE = "data/feedbacks.csv"
+SENTIMENT_INDEX_FILE = "data/sentiment_index.csv"  # Kept up to date by app.py /update_feedback
+CVS_CSV = "data/cvs.csv"
+JDS_CSV = "data/jds.csv"
 OUTPUT_DIR = "data"
 
 # Ensure output directory exists
@@ -26,46 +32,94 @@ def load_text_files(directory, prefix, count):
             print(f"⚠️ File not found: {path}")
     return texts
 
+def load_csv_corpus():
+    """Fallback corpus: CV and JD rows from the CSVs, with their real IDs and structured fields."""
+    return pd.read_csv(CVS_CSV), pd.read_csv(JDS_CSV)
+
 # -------------------
 # Updated predict function
 # -------------------
-def predict(cv_texts, jd_texts, feedback_df=None):
+def load_sentiment_index(feedback_df):
+    """
+    The persisted sentiment index (which app.py updates per feedback), with the feedback log
+    rows it has not absorbed yet folded in and saved. Delete SENTIMENT_INDEX_FILE to rebuild it.
+    """
+    with locked(SENTIMENT_INDEX_FILE):
+        sentiment_index = SentimentIndex.load(SENTIMENT_INDEX_FILE)
+        absorbed = sentiment_index.absorb_feedback_log(feedback_df)
+        if absorbed or not os.path.exists(SENTIMENT_INDEX_FILE):
+            print(f"🧱 Added {absorbed} new feedbacks to {SENTIMENT_INDEX_FILE}")
+            sentiment_index.save(SENTIMENT_INDEX_FILE)
+    return sentiment_index
+
+def predict(cv_texts, jd_texts, feedback_df=None, cv_ids=None, jd_ids=None, eligibility=None, sentiment_index=None,
+            use_store=False):
     """
     cv_texts: list of CV texts
     jd_texts: list of JD texts
-    feedback_df: optional DataFrame of feedbacks
+    feedback_df: optional DataFrame of feedbacks (used when no sentiment_index is given)
+    cv_ids / jd_ids: optional IDs for the texts (default CV1.., JD1..)
+    eligibility: optional EligibilityIndex built on the same CVs/JDs (in the same order)
+    sentiment_index: optional pre-aggregated SentimentIndex, e.g. from load_sentiment_index
+    use_store: read similarity scores from utils.ingest's store (only for the cvs.csv/jds.csv corpus)
     Returns: final decision DataFrame
     """
-    # Step 1: Compute CV ↔ JD similarity
-    match_df = compute_similarity(cv_texts, jd_texts)
+    final_df, _, _, _ = run_batch(cv_texts, jd_texts, feedback_df, cv_ids, jd_ids, eligibility, sentiment_index,
+                                  use_store)
+    return final_df
 
-    # Step 2: Sentiment Analysis (optional)
-    if feedback_df is not None and not feedback_df.empty:
-        sentiment_df = analyze_sentiment(feedback_df)
-    else:
-        sentiment_df = pd.DataFrame()
-
-    # Step 3: Generate automatic rewards for RL agent
-    states = [f"cv_{i}" for i in range(len(cv_texts))]
-    rewards = {}
-    for i, cv in enumerate(cv_texts):
-        rewards[states[i]] = {}
-        for action in ACTIONS:
-            if action == "Hire":
-                # Simple reward: number of common words with JD i
-                rewards[states[i]][action] = len(set(cv.split()) & set(jd_texts[i].split()))
-            elif action == "Reject":
-                rewards[states[i]][action] = 0
-            else:  # Reassign
-                rewards[states[i]][action] = 0.5
-
-    # Step 4: Train RL Agent
-    q_table = train_rl_agent(states, rewards)
+def run_batch(cv_texts, jd_texts, feedback_df=None, cv_ids=None, jd_ids=None, eligibility=None, sentiment_index=None,
+              use_store=False):
+    """Same as predict, but also returns the match and sentiment frames and the trained agent for reporting."""
+    # Step 0: Prune pairs that fail the JDs' structured requirements
+    pairs = None
+    if eligibility is not None:
+        pairs = eligibility.eligible_pairs()
+        counts = eligibility.counts()
+        print(f"🔎 Eligibility filter: {counts['scored'].sum()} pairs scored, {counts['pruned'].sum()} pruned")
+
+    # Step 1: CV ↔ JD similarity, from the ingestion store when it is current for these JDs
+    match_df = None
+    if use_store:
+        match_df = stored_similarity(cv_texts, jd_texts, cv_ids, jd_ids, pairs)
+        if match_df is None:
+            print("⚠️ No current similarity store (run utils.ingest); computing similarity from scratch")
+    if match_df is None:
+        match_df = compute_similarity(cv_texts, jd_texts, cv_ids, jd_ids, pairs)
+
+    # Step 2: Sentiment aggregated per (candidate, JD) pair and per candidate
+    if sentiment_index is None:
+        sentiment_index = SentimentIndex()
+        if feedback_df is not None and not feedback_df.empty:
+            sentiment_index.add_sentiment(analyze_sentiment(feedback_df))
+    sentiment_df = sentiment_index.candidate_frame()
+    sentiment_df["sentiment"] = sentiment_df["mean_polarity"].map(polarity_label)
+
+    # Step 3: Rewards for every CV × JD pair from token-set overlap (vectorised)
+    rewards = compute_pair_rewards(cv_texts, jd_texts, pairs)
+
+    # Step 4: Train RL Agent on all pairs at once
+    pair_polarity = pd.Series(sentiment_index.lookup(match_df["CV_ID"], match_df["JD_ID"])).fillna(0.0)
+    agent = RLAgent()
+    q_table = train_rl_agent(match_df["similarity_score"], pair_polarity, rewards, agent)
 
     # Step 5: Make final decision
-    final_df = make_decision(match_df, sentiment_df, q_table)
+    final_df = make_decision(match_df, sentiment_index, q_table)
+    final_df["reason"] = "score"
 
-    return final_df
+    # Step 6: Pruned pairs are still reported, as rejections with their reason
+    if eligibility is not None:
+        pruned_cv, pruned_jd = eligibility.pruned_pairs()
+        pruned_df = pd.DataFrame({
+            "CV_ID": eligibility.candidate_ids[pruned_cv],
+            "JD_ID": eligibility.jd_ids[pruned_jd],
+            "decision": "Reject",
+            "reason": "ineligible"
+        })
+        order = np.lexsort((np.concatenate([pairs[1], pruned_jd]), np.concatenate([pairs[0], pruned_cv])))
+        final_df = pd.concat([final_df, pruned_df], ignore_index=True).iloc[order].reset_index(drop=True)
+
+    return final_df, match_df, sentiment_df, agent
 
 # -------------------
 # Main workflow
@@ -74,6 +128,14 @@ def main():
     # Load CVs and JDs
     cv_texts = load_text_files(CV_DIR, "cv", 2)
     jd_texts = load_text_files(JD_DIR, "jd", 2)
+    cv_ids, jd_ids, eligibility, use_store = None, None, None, False
+    if not cv_texts or not jd_texts:
+        print(f"⚠️ No sample texts found, using {CVS_CSV} and {JDS_CSV}")
+        cvs, jds = load_csv_corpus()
+        cv_texts, jd_texts = cvs["skills"].tolist(), jds["description"].tolist()
+        cv_ids, jd_ids = cvs["candidate_id"].tolist(), jds["jd_id"].tolist()
+        eligibility = EligibilityIndex(cvs, jds)
+        use_store = True
 
     # Load feedbacks if available
     if os.path.exists(FEEDBACK_FILE):
@@ -83,24 +145,17 @@ def main():
         feedback_df = pd.DataFrame()
 
     # Get final AI decisions
-    final_df = predict(cv_texts, jd_texts, feedback_df)
+    sentiment_index = load_sentiment_index(feedback_df)
+    final_df, match_df, sentiment_df, agent = run_batch(cv_texts, jd_texts, feedback_df, cv_ids, jd_ids,
+                                                        eligibility, sentiment_index, use_store)
 
     # Save outputs
     final_csv = os.path.join(OUTPUT_DIR, "final_results.csv")
     final_df.to_csv(final_csv, index=False)
     print(f"✅ Final decisions saved to {final_csv}")
 
-    # Optionally generate visualizations
-    try:
-        match_df = compute_similarity(cv_texts, jd_texts)
-        if not feedback_df.empty:
-            sentiment_df = analyze_sentiment(feedback_df)
-        else:
-            sentiment_df = pd.DataFrame()
-        generate_all_plots(match_df, sentiment_df)
-        print("📊 Visualizations generated successfully")
-    except Exception as e:
-        print(f"❌ Error generating visualizations: {e}")
+    # Render visualizations in the background; the reward curve is the batch agent's own history
+    return start_plot_worker(match_df, sentiment_df, agent.history)
 
 if __name__ == "__main__":
     main()
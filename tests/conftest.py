@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests import the app modules as `utils.*`, like main.py and app.py do
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
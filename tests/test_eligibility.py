@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.eligibility import EligibilityIndex, parse_requirements
+
+CVS = pd.DataFrame({
+    "candidate_id": [1, 2, 3, 4],
+    "education": ["M.Sc Data Science", "B.E. IT", np.nan, "B.Tech AI"],
+    "experience_years": [5, 1, np.nan, 3],
+    "location": ["Pune", "Mumbai", np.nan, " "],
+})
+
+
+def test_min_education_uses_degree_prefixes():
+    assert parse_requirements({"jd_id": 1, "min_education": "Masters"})["min_education"] == 2
+    assert parse_requirements({"jd_id": 1, "min_education": "PhD"})["min_education"] == 3
+
+
+def test_invalid_requirements_name_the_jd():
+    with pytest.raises(ValueError, match="JD 7"):
+        parse_requirements({"jd_id": 7, "min_education": "Diploma"})
+    with pytest.raises(ValueError, match="JD 7"):
+        parse_requirements({"jd_id": 7, "min_experience_years": "senior"})
+
+
+def test_requirements_prune_known_fields_only():
+    jds = pd.DataFrame({
+        "jd_id": [1, 2, 3],
+        "min_experience_years": [2, np.nan, np.nan],
+        "min_education": [np.nan, "Master", np.nan],
+        "locations": [np.nan, np.nan, "pune;Delhi"],
+    })
+    index = EligibilityIndex(CVS, jds)
+
+    # CV 3 has no structured fields and CV 4 a blank location: unknown never prunes
+    assert index.mask(1).tolist() == [True, False, True, True]
+    assert index.mask(2).tolist() == [True, False, True, False]
+    assert index.mask(3).tolist() == [True, False, True, True]
+
+    counts = index.counts()
+    assert counts["scored"].tolist() == [3, 2, 3]
+    assert counts["pruned"].tolist() == [1, 2, 1]
+    assert len(index.eligible_pairs()[0]) + len(index.pruned_pairs()[0]) == len(CVS) * len(jds)
+
+
+def test_pruning_does_not_change_the_scores_of_eligible_pairs(tmp_path, monkeypatch):
+    from utils.matching_engine import compute_similarity
+    from utils.rl_agent import compute_pair_rewards
+    (tmp_path / "models").mkdir()
+    monkeypatch.chdir(tmp_path)  # compute_similarity saves models/tfidf_model.pkl
+
+    cv_texts = ["Python, SQL, Statistics", "Docker, Kubernetes", "Excel, Communication", "Python, Docker"]
+    jd_texts = ["Analyze data with Python and SQL.", "Run Docker and Kubernetes clusters."]
+    pairs = (np.array([0, 1, 3]), np.array([0, 1, 1]))
+
+    full = compute_similarity(cv_texts, jd_texts)["similarity_score"].to_numpy().reshape(len(cv_texts), -1)
+    pruned = compute_similarity(cv_texts, jd_texts, pairs=pairs)["similarity_score"].to_numpy()
+    np.testing.assert_allclose(pruned, full[pairs])
+
+    full_rewards = compute_pair_rewards(cv_texts, jd_texts).reshape(len(cv_texts), len(jd_texts), -1)
+    np.testing.assert_allclose(compute_pair_rewards(cv_texts, jd_texts, pairs), full_rewards[pairs])
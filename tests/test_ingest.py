@@ -0,0 +1,125 @@
+import pandas as pd
+import pytest
+
+from utils import ingest
+
+CVS = pd.DataFrame({
+    "candidate_id": [1, 2, 3],
+    "name": ["Jennifer King", "Joshua Ware", "Amit Rao"],
+    "education": ["M.Sc Data Science", "B.E. Computer", "B.Tech AI"],
+    "experience_years": [3, 2, 5],
+    "skills": ["TensorFlow, Python, Statistics", "SQL, Pandas, Data Analysis", "Docker, Kubernetes, Python"],
+    "location": ["Pune", "Mumbai", "Delhi"],
+})
+JDS = pd.DataFrame({
+    "jd_id": [1, 2],
+    "title": ["Data Scientist", "ML Engineer"],
+    "description": ["Analyze data and build models using Python and statistics.",
+                    "Deploy machine learning models using TensorFlow and Docker."],
+})
+NEW_CV = {"name": "Priya Shah", "education": "M.Tech", "experience_years": 4,
+          "skills": "Python, Docker, Machine Learning", "location": "Pune"}
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    for name, file_name in [("CVS_PATH", "cvs.csv"), ("JDS_PATH", "jds.csv"),
+                            ("SIMILARITY_STORE_PATH", "similarity_store.csv"),
+                            ("STORE_JDS_PATH", "similarity_store.jds"), ("HASH_INDEX_PATH", "cv_hashes.csv"),
+                            ("CORPUS_VERSION_PATH", "corpus_version"), ("LOCK_PATH", ".ingest.lock"),
+                            ("JOURNAL_PATH", ".ingest.journal"), ("VECTORIZER_PATH", "ingest_tfidf.pkl")]:
+        monkeypatch.setattr(ingest, name, str(tmp_path / file_name))
+    CVS.to_csv(ingest.CVS_PATH, index=False)
+    JDS.to_csv(ingest.JDS_PATH, index=False)
+    return tmp_path
+
+
+def read_cvs():
+    return pd.read_csv(ingest.CVS_PATH)
+
+
+def corpus_version():
+    with open(ingest.CORPUS_VERSION_PATH, "r", encoding="utf-8") as f:
+        return int(f.read())
+
+
+def test_duplicates_are_skipped_across_case_spacing_and_number_format(data_dir):
+    existing = CVS.drop(columns="candidate_id").iloc[0].to_dict()
+    reupload = dict(NEW_CV, name="  PRIYA   shah ", skills="python,   DOCKER, Machine\tLearning ", experience_years="4.0")
+    appended = ingest.ingest([NEW_CV, reupload, dict(existing, name=existing["name"].upper())], workers=1)
+
+    assert appended == 1
+    cvs = read_cvs()
+    assert cvs["candidate_id"].tolist() == [1, 2, 3, 4]
+    assert ingest.ingest([dict(NEW_CV, experience_years=4.0)], workers=1) == 0
+
+
+def test_crash_before_commit_is_rolled_back_on_the_next_run(data_dir, monkeypatch):
+    ingest.ingest([], workers=1)  # Bootstrap the store and hash index
+    before = {path: open(path, "rb").read()
+              for path in [ingest.CVS_PATH, ingest.SIMILARITY_STORE_PATH, ingest.HASH_INDEX_PATH]}
+
+    def crash():
+        raise RuntimeError("killed mid-batch")
+    commit_batch = ingest.commit_batch
+    monkeypatch.setattr(ingest, "commit_batch", crash)
+    with pytest.raises(RuntimeError):
+        ingest.ingest([NEW_CV], workers=1)
+    monkeypatch.setattr(ingest, "commit_batch", commit_batch)
+    assert len(read_cvs()) == len(CVS) + 1  # The appends landed and the journal was left behind
+
+    ingest.rollback_incomplete_batch()
+    for path, data in before.items():
+        assert open(path, "rb").read() == data
+
+    # Retrying the batch appends it exactly once
+    assert ingest.ingest([NEW_CV], workers=1) == 1
+    assert not read_cvs()["candidate_id"].duplicated().any()
+
+
+def test_corpus_version_tracks_cvs_csv_rows_including_hand_added_ones(data_dir):
+    ingest.ingest([NEW_CV], workers=1)
+    assert corpus_version() == len(read_cvs()) == 4
+
+    with open(ingest.CVS_PATH, "a", encoding="utf-8") as f:
+        f.write('9,Hand Added,B.Tech,3,"Python, SQL",Pune')  # No final newline, as editors often leave it
+    ingest.ingest([dict(NEW_CV, name="Someone Else")], workers=1)
+
+    cvs = read_cvs()
+    assert corpus_version() == len(cvs) == 6
+    assert cvs["candidate_id"].tolist() == [1, 2, 3, 4, 9, 10]
+    assert set(pd.read_csv(ingest.HASH_INDEX_PATH)["candidate_id"]) == set(cvs["candidate_id"])
+
+
+def test_stored_similarity_covers_every_pair_and_goes_stale_with_the_jds(data_dir):
+    ingest.ingest([NEW_CV], workers=1)
+    cvs = read_cvs()
+    cv_texts, jd_texts = cvs["skills"].tolist(), JDS["description"].tolist()
+
+    match_df = ingest.stored_similarity(cv_texts, jd_texts, cvs["candidate_id"].tolist(), JDS["jd_id"].tolist())
+    assert len(match_df) == len(cvs) * len(JDS)
+    assert match_df["similarity_score"].notna().all()
+
+    assert ingest.stored_similarity(cv_texts, jd_texts[:1], cvs["candidate_id"].tolist(), [1]) is None
+
+
+def test_app_refresh_reads_only_rows_behind_the_corpus_version(data_dir, monkeypatch):
+    pytest.importorskip("flask")
+    pytest.importorskip("google.genai")
+    import app
+    if app.AGENT is None:
+        pytest.skip("app could not load data/cvs.csv")
+
+    monkeypatch.setattr(app, "CVS_PATH", ingest.CVS_PATH)
+    monkeypatch.setattr(app, "CORPUS_VERSION_PATH", ingest.CORPUS_VERSION_PATH)
+    monkeypatch.setattr(app.AGENT, "cvs", read_cvs())
+    monkeypatch.setattr(app.AGENT, "jds", JDS)
+    monkeypatch.setattr(app.AGENT, "eligibility", app.AGENT.eligibility)  # Restored after the test
+
+    ingest.ingest([NEW_CV, dict(NEW_CV, name="Someone Else")], workers=1)
+    app.refresh_agent_cvs()
+
+    assert app.AGENT.cvs["candidate_id"].tolist() == read_cvs()["candidate_id"].tolist()
+    assert app.AGENT.eligibility.is_eligible(5, 1)
+    app.refresh_agent_cvs()  # Already current: nothing is appended twice
+    assert len(app.AGENT.cvs) == corpus_version()
@@ -0,0 +1,42 @@
+import os
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from utils.decision_engine import make_decision
+from utils.rl_agent import compute_pair_rewards, train_rl_agent
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def bundled_match_df():
+    cvs = pd.read_csv(os.path.join(DATA_DIR, "cvs.csv"))
+    jds = pd.read_csv(os.path.join(DATA_DIR, "jds.csv"))
+    cv_texts, jd_texts = cvs["skills"].tolist(), jds["description"].tolist()
+
+    # Same scoring as compute_similarity, without writing models/tfidf_model.pkl
+    tfidf = TfidfVectorizer().fit_transform(cv_texts + jd_texts)
+    similarity = cosine_similarity(tfidf[:len(cv_texts)], tfidf[len(cv_texts):])
+    match_df = pd.DataFrame({
+        "CV_ID": np.repeat(cvs["candidate_id"].to_numpy(), len(jds)),
+        "JD_ID": np.tile(jds["jd_id"].to_numpy(), len(cvs)),
+        "similarity_score": similarity.ravel()
+    })
+    return cv_texts, jd_texts, match_df
+
+
+def test_pair_rewards_match_skill_lists_against_jd_words():
+    rewards = compute_pair_rewards(["Docker, TensorFlow, Machine Learning"], ["Deploy machine learning models using TensorFlow and Docker."])
+    assert rewards[0, 0] > 0
+    assert rewards[0, 1] == -rewards[0, 0]
+
+
+def test_batch_policy_is_not_constant_on_bundled_data():
+    cv_texts, jd_texts, match_df = bundled_match_df()
+    rewards = compute_pair_rewards(cv_texts, jd_texts)
+    assert (rewards[:, 0] > 0).any()
+
+    q_table = train_rl_agent(match_df["similarity_score"], np.zeros(len(match_df)), rewards)
+    final_df = make_decision(match_df, None, q_table)
+    assert final_df["rl_action"].nunique() > 1
@@ -0,0 +1,83 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from utils.decision_engine import make_decision
+from utils.sentiment_analyzer import SentimentIndex, analyze_sentiment, record_feedback
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def test_make_decision_is_one_row_per_pair_on_bundled_feedback():
+    cvs = pd.read_csv(os.path.join(DATA_DIR, "cvs.csv"))
+    jds = pd.read_csv(os.path.join(DATA_DIR, "jds.csv"))
+    feedback_df = pd.read_csv(os.path.join(DATA_DIR, "feedbacks.csv"))
+    # Candidates with several feedbacks are what used to multiply their rows
+    assert feedback_df["candidate_id"].duplicated().any()
+
+    match_df = pd.DataFrame({
+        "CV_ID": np.repeat(cvs["candidate_id"].to_numpy(), len(jds)),
+        "JD_ID": np.tile(jds["jd_id"].to_numpy(), len(cvs)),
+        "similarity_score": 0.5
+    })
+    sentiment_index = SentimentIndex().add_sentiment(analyze_sentiment(feedback_df))
+    final_df = make_decision(match_df, sentiment_index)
+
+    assert len(final_df) == len(match_df)
+    assert not final_df.duplicated(["CV_ID", "JD_ID"]).any()
+
+
+def test_lookup_prefers_pair_then_candidate_mean():
+    sentiment_index = SentimentIndex().add_sentiment(pd.DataFrame({
+        "candidate_id": [1, 1, 2], "jd_id": [1, 1, 3], "polarity": [0.2, 0.4, -0.5]
+    }))
+    sentiment_index.update(1, 2, -1.0)
+
+    polarity = sentiment_index.lookup([1, 1, 1, 2, 3], [1, 2, 3, 1, 1])
+    np.testing.assert_allclose(polarity[:4], [0.3, -1.0, (0.2 + 0.4 - 1.0) / 3, -0.5])
+    assert np.isnan(polarity[4])
+
+
+def test_save_and_load_round_trip(tmp_path):
+    sentiment_index = SentimentIndex().add_sentiment(pd.DataFrame({
+        "candidate_id": [1, 1, 2], "jd_id": [1, 2, None], "polarity": [0.2, 0.4, -0.5]
+    }))
+    path = str(tmp_path / "sentiment_index.csv")
+    sentiment_index.save(path)
+
+    loaded = SentimentIndex.load(path)
+    assert loaded.last_feedback_id == 0
+    loaded.update(1, 1, 0.0)
+    assert loaded.pairs[(1, 1)] == [0.2, 2, 0.0]
+    assert loaded.candidates[2] == [-0.5, 1, -0.5]
+    np.testing.assert_allclose(loaded.lookup([1, 2], [2, 9]), [0.4, -0.5])
+    assert SentimentIndex.load(str(tmp_path / "missing.csv")).pairs == {}
+
+
+def test_feedback_log_rows_are_absorbed_once_after_live_updates(tmp_path, monkeypatch):
+    import main
+    path = str(tmp_path / "sentiment_index.csv")
+    monkeypatch.setattr(main, "SENTIMENT_INDEX_FILE", path)
+    feedback_df = pd.read_csv(os.path.join(DATA_DIR, "feedbacks.csv"))
+
+    # The API records a feedback before any batch run has built the index
+    record_feedback(path, 999, 1, 0.5)
+    sentiment_index = main.load_sentiment_index(feedback_df)
+    assert sum(n for _, n, _ in sentiment_index.candidates.values()) == len(feedback_df) + 1
+    assert sentiment_index.last_feedback_id == feedback_df["feedback_id"].max()
+
+    # Re-running absorbs nothing twice; rows appended to the log later are picked up
+    new_row = feedback_df.tail(1).assign(feedback_id=feedback_df["feedback_id"].max() + 1, candidate_id=1000)
+    sentiment_index = main.load_sentiment_index(pd.concat([feedback_df, new_row], ignore_index=True))
+    assert sum(n for _, n, _ in sentiment_index.candidates.values()) == len(feedback_df) + 2
+    assert SentimentIndex.load(path).candidates[1000][1] == 1
+
+
+def test_concurrent_workers_do_not_drop_each_others_feedback(tmp_path):
+    path = str(tmp_path / "sentiment_index.csv")
+    updates = [(candidate_id, 1, 0.1) for candidate_id in range(40)]
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(record_feedback, [path] * len(updates), *zip(*updates)))
+
+    assert len(SentimentIndex.load(path).candidates) == len(updates)
@@ -0,0 +1,69 @@
+import matplotlib.image
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.rl_agent import RLAgent, compute_pair_rewards, train_rl_agent
+from utils.visualization import (MAX_FIGURE_INCHES, plot_rl_rewards, plot_score_density,
+                                 plot_similarity_heatmap, start_plot_worker)
+
+
+@pytest.fixture
+def report_dir(tmp_path, monkeypatch):
+    # Plots are saved under data/ relative to the working directory, like main.py runs them
+    (tmp_path / "data").mkdir()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "data"
+
+
+def long_match_df(n_cvs, n_jds, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "CV_ID": np.repeat(np.arange(1, n_cvs + 1), n_jds),
+        "JD_ID": np.tile(np.arange(1, n_jds + 1), n_cvs),
+        "similarity_score": rng.random(n_cvs * n_jds)
+    })
+
+
+def test_heatmap_with_many_jds_stays_within_the_size_cap(report_dir):
+    # 40 JDs × top 10 CVs is 400 heatmap rows, which used to mean a 100-inch-tall figure
+    plot_similarity_heatmap(long_match_df(500, 40))
+
+    height, width, _ = matplotlib.image.imread(report_dir / "similarity_heatmap.png").shape
+    dpi = matplotlib.rcParams["savefig.dpi"]
+    dpi = matplotlib.rcParams["figure.dpi"] if dpi == "figure" else dpi
+    assert height <= MAX_FIGURE_INCHES * dpi
+    assert width <= MAX_FIGURE_INCHES * dpi
+
+
+def trained_agent_history(match_df):
+    cv_texts = ["Python, SQL, Machine Learning", "Docker, Kubernetes", "Excel, Communication"]
+    jd_texts = ["Build machine learning models in Python and SQL.", "Run Docker and Kubernetes clusters."]
+    match_df = match_df[match_df["CV_ID"].le(3) & match_df["JD_ID"].le(2)]
+    agent = RLAgent()
+    train_rl_agent(match_df["similarity_score"], np.zeros(len(match_df)), compute_pair_rewards(cv_texts, jd_texts), agent)
+    return agent.history
+
+
+def test_score_density_renders(report_dir):
+    plot_score_density(long_match_df(50, 5))
+    assert (report_dir / "score_density.png").stat().st_size > 0
+
+
+def test_reward_curve_renders_agent_history(report_dir):
+    history = trained_agent_history(long_match_df(3, 2))
+    assert len(history) > 1
+    plot_rl_rewards(history)
+    assert (report_dir / "rl_rewards.png").stat().st_size > 0
+
+
+def test_plot_worker_writes_every_chart(report_dir):
+    match_df = long_match_df(20, 3)
+    sentiment_df = pd.DataFrame({"candidate_id": [1, 2, 3], "sentiment": ["Positive", "Negative", "Neutral"]})
+
+    worker = start_plot_worker(match_df, sentiment_df, trained_agent_history(match_df))
+    worker.join(timeout=60)
+
+    assert not worker.is_alive()
+    for chart in ["similarity_heatmap.png", "score_density.png", "sentiment_pie.png", "rl_rewards.png"]:
+        assert (report_dir / chart).exists()
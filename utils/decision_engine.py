@@ -1,17 +1,30 @@
+import numpy as np
 import pandas as pd
+from utils.rl_agent import greedy_actions
+from utils.sentiment_analyzer import polarity_label
 
-def make_decision(match_df, sentiment_df, rl_q_table):
-    merged = match_df.merge(sentiment_df, left_on="CV_ID", right_on="candidate_id", how="left")
+def make_decision(match_df, sentiment_index, rl_q_table=None):
+    """
+    sentiment_index: a SentimentIndex (or None). Polarity is looked up per CV×JD row,
+    so the output has exactly one row per row of match_df.
+    """
+    if sentiment_index is not None:
+        polarity = pd.Series(sentiment_index.lookup(match_df["CV_ID"], match_df["JD_ID"]), index=match_df.index)
+    else:
+        polarity = pd.Series(np.nan, index=match_df.index)
 
-    final = []
-    for _, row in merged.iterrows():
-        score = (row['similarity_score'] * 0.7) + (row['polarity'] * 0.3)
-        decision = "Hire" if score > 0.3 else "Reject"
-        final.append({
-            "CV_ID": row["CV_ID"],
-            "JD_ID": row["JD_ID"],
-            "score": round(score, 3),
-            "sentiment": row["sentiment"],
-            "decision": decision
-        })
-    return pd.DataFrame(final)
+    # Candidates without feedback are scored as neutral
+    polarity = polarity.fillna(0.0)
+    score = (match_df["similarity_score"] * 0.7) + (polarity * 0.3)
+
+    final = pd.DataFrame({
+        "CV_ID": match_df["CV_ID"],
+        "JD_ID": match_df["JD_ID"],
+        "score": score.round(3),
+        "sentiment": polarity.map(polarity_label),
+        "decision": np.where(score > 0.3, "Hire", "Reject")
+    })
+    if rl_q_table is not None:
+        # Policy suggestion from the trained Q-table, alongside the score-based decision
+        final["rl_action"] = greedy_actions(rl_q_table, match_df["similarity_score"], polarity)
+    return final
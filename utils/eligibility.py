@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+# Ordinal education levels; a JD's min_education names one of these
+EDUCATION_LEVELS = {"bachelor": 1, "master": 2, "phd": 3}
+
+# Optional requirement columns in jds.csv (blank = no requirement).
+# A CV field that is blank (e.g. CVs ingested from plain text) is unknown and never prunes.
+MIN_YEARS_COL = "min_experience_years"
+MIN_EDUCATION_COL = "min_education"
+LOCATIONS_COL = "locations"  # ';'-separated list
+
+
+def education_level(education):
+    """Maps a degree string from cvs.csv (e.g. 'B.E. IT', 'M.Sc Data Science') to its ordinal level."""
+    if pd.isna(education):
+        return 0
+    degree = str(education).strip().lower()
+    if degree.startswith("ph"):
+        return EDUCATION_LEVELS["phd"]
+    if degree.startswith("m"):
+        return EDUCATION_LEVELS["master"]
+    if degree.startswith("b"):
+        return EDUCATION_LEVELS["bachelor"]
+    return 0
+
+
+def normalize_location(location):
+    return " ".join(str(location).lower().split())
+
+
+def is_blank(values):
+    """True where a CV field is missing or only whitespace."""
+    return values.isna() | (values.astype(str).str.strip() == "")
+
+
+def full_grid(n_cvs, n_jds):
+    """(cv_positions, jd_positions) of every CV × JD pair, CV-major."""
+    return np.divmod(np.arange(n_cvs * n_jds), n_jds)
+
+
+def parse_requirements(jd_row):
+    """Structured requirements of one JD row; None for anything the JD does not declare."""
+    jd_id = jd_row.get("jd_id")
+    min_years = jd_row.get(MIN_YEARS_COL)
+    min_education = jd_row.get(MIN_EDUCATION_COL)
+    locations = jd_row.get(LOCATIONS_COL)
+
+    if not pd.isna(min_years):
+        try:
+            min_years = float(min_years)
+        except ValueError:
+            raise ValueError(f"JD {jd_id}: {MIN_YEARS_COL} must be a number, got {min_years!r}")
+    if not pd.isna(min_education):
+        level = education_level(min_education)  # Same prefix rules as CVs: 'Masters', 'M.Tech' → master
+        if level == 0:
+            raise ValueError(f"JD {jd_id}: unknown {MIN_EDUCATION_COL} {min_education!r} (expected Bachelor, Master or PhD)")
+        min_education = level
+
+    return {
+        "min_years": None if pd.isna(min_years) else min_years,
+        "min_education": None if pd.isna(min_education) else min_education,
+        "locations": None if pd.isna(locations) else {normalize_location(loc) for loc in str(locations).split(";") if loc.strip()}
+    }
+
+
+class EligibilityIndex:
+    """
+    Columnar pre-filter over the CV pool, built once per corpus:
+    - experience_years as a sorted array (a min-years requirement is one searchsorted)
+    - one bitmap per education level (CVs at or above that level)
+    - dictionary-encoded locations (a location list is one isin over the codes)
+    plus an "unknown" bitmap per field; CVs with an unknown field pass that requirement.
+    Per-JD masks are cached, so pruning happens before any TF-IDF or sentiment work.
+    """
+
+    def __init__(self, cvs, jds):
+        self.candidate_ids = cvs["candidate_id"].to_numpy()
+        self.jd_ids = jds["jd_id"].to_numpy()
+        self._cv_positions = {cid: i for i, cid in enumerate(self.candidate_ids)}
+        self._requirements = {row["jd_id"]: parse_requirements(row) for row in jds.to_dict("records")}
+
+        years = pd.to_numeric(cvs["experience_years"], errors="coerce")
+        self._unknown_years = years.isna().to_numpy()
+        years = years.fillna(-1).to_numpy()
+        self._years_order = np.argsort(years, kind="stable")
+        self._sorted_years = years[self._years_order]
+
+        self._unknown_education = is_blank(cvs["education"]).to_numpy()
+        levels = cvs["education"].map(education_level).to_numpy()
+        self._education_bitmaps = {level: levels >= level for level in EDUCATION_LEVELS.values()}
+
+        self._unknown_location = is_blank(cvs["location"]).to_numpy()
+        self._location_codes, locations = pd.factorize(cvs["location"].map(normalize_location, na_action="ignore"))
+        self._location_lookup = {location: code for code, location in enumerate(locations)}
+
+        self._masks = {}
+
+    def mask(self, jd_id):
+        """Boolean array over the CV pool: True where the CV meets every requirement of the JD."""
+        if jd_id in self._masks:
+            return self._masks[jd_id]
+
+        eligible = np.ones(len(self.candidate_ids), dtype=bool)
+        requirements = self._requirements.get(jd_id)
+        if requirements is not None:
+            if requirements["min_years"] is not None:
+                start = np.searchsorted(self._sorted_years, requirements["min_years"], side="left")
+                meets_years = np.zeros_like(eligible)
+                meets_years[self._years_order[start:]] = True
+                eligible &= meets_years | self._unknown_years
+            if requirements["min_education"] is not None:
+                eligible &= self._education_bitmaps[requirements["min_education"]] | self._unknown_education
+            if requirements["locations"] is not None:
+                codes = [self._location_lookup[loc] for loc in requirements["locations"] if loc in self._location_lookup]
+                eligible &= np.isin(self._location_codes, codes) | self._unknown_location
+
+        self._masks[jd_id] = eligible
+        return eligible
+
+    def _matrix(self):
+        return np.column_stack([self.mask(jd_id) for jd_id in self.jd_ids])
+
+    def eligible_pairs(self):
+        """(cv_positions, jd_positions) of every eligible pair, CV-major like compute_similarity."""
+        return np.nonzero(self._matrix())
+
+    def pruned_pairs(self):
+        """(cv_positions, jd_positions) of every pair that fails a requirement, CV-major."""
+        return np.nonzero(~self._matrix())
+
+    def eligible_candidate_ids(self):
+        """Candidates eligible for at least one JD."""
+        any_jd = np.logical_or.reduce([self.mask(jd_id) for jd_id in self.jd_ids])
+        return self.candidate_ids[any_jd]
+
+    def is_eligible(self, candidate_id, jd_id):
+        """Single-pair check; CVs or JDs the index has not seen are not pruned."""
+        position = self._cv_positions.get(candidate_id)
+        if position is None or jd_id not in self._requirements:
+            return True
+        return bool(self.mask(jd_id)[position])
+
+    def counts(self):
+        """Scored vs pruned candidates per JD."""
+        scored = np.array([self.mask(jd_id).sum() for jd_id in self.jd_ids], dtype=int)
+        return pd.DataFrame({
+            "jd_id": self.jd_ids,
+            "scored": scored,
+            "pruned": len(self.candidate_ids) - scored
+        })
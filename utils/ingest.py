@@ -0,0 +1,341 @@
+# -----------------------------------------------------------
+# Incremental CV ingestion: dedupe → vectorise → append
+# -----------------------------------------------------------
+# Usage:
+#   python -m utils.ingest data/new_cvs/          # directory of *.txt CVs
+#   python -m utils.ingest uploads.ndjson         # one JSON CV record per line
+#   cat uploads.ndjson | python -m utils.ingest -
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+from utils.preprocess import clean_text
+from utils.eligibility import full_grid
+
+# --- File Paths ---
+CVS_PATH = "data/cvs.csv"
+JDS_PATH = "data/jds.csv"
+SIMILARITY_STORE_PATH = "data/similarity_store.csv"  # Long format: CV_ID, JD_ID, similarity_score
+STORE_JDS_PATH = "data/similarity_store.jds"         # Fingerprint of the JDs the store was scored against
+HASH_INDEX_PATH = "data/cv_hashes.csv"               # content_hash, candidate_id
+CORPUS_VERSION_PATH = "data/corpus_version"          # Row count of cvs.csv, polled by app.py
+LOCK_PATH = "data/.ingest.lock"
+JOURNAL_PATH = "data/.ingest.journal"                # Pre-append file sizes of an unfinished batch
+VECTORIZER_PATH = "models/ingest_tfidf.pkl"          # Frozen vocabulary, fitted once at bootstrap
+
+CV_FIELDS = ["name", "education", "experience_years", "skills", "location"]
+CHUNK_SIZE = 500  # CVs per process-pool task
+
+
+# --- 1. Reading new CVs ---
+
+def read_text_dir(directory):
+    """One record per *.txt file, the same plain-text CVs main.load_text_files reads."""
+    records = []
+    for file_name in sorted(os.listdir(directory)):
+        if file_name.endswith(".txt"):
+            with open(os.path.join(directory, file_name), "r", encoding="utf-8") as f:
+                records.append({"skills": f.read().strip()})
+    return records
+
+
+def read_ndjson(stream):
+    """One JSON object per line with cvs.csv fields; a bare 'text' key is used as the skills text."""
+    records = []
+    for line in stream:
+        if line.strip():
+            record = json.loads(line)
+            if "skills" not in record and "text" in record:
+                record["skills"] = record.pop("text")
+            records.append(record)
+    return records
+
+
+def to_corpus_rows(records):
+    """New records in the form they are stored in cvs.csv: CV_FIELDS columns, numeric years, text skills."""
+    rows = pd.DataFrame(records).reindex(columns=CV_FIELDS)
+    years = pd.to_numeric(rows["experience_years"], errors="coerce")
+    rows["experience_years"] = years.astype("Int64") if (years.dropna() % 1 == 0).all() else years
+    rows["skills"] = rows["skills"].fillna("").astype(str)
+    return rows
+
+
+def _canonical(value):
+    if pd.isna(value):
+        return ""
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        number = float(value)
+        return str(int(number)) if number.is_integer() else repr(number)  # 5, 5.0 → '5'
+    return " ".join(str(value).lower().split())
+
+
+def content_hash(row):
+    """SHA-256 of a stored-form CV row, so re-uploads with different spacing/case/number format still match."""
+    parts = [_canonical(row.get(field)) for field in CV_FIELDS]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+# --- 2. Process-pool vectorisation against the frozen vocabulary ---
+
+_VECTORIZER = None
+_JD_MATRIX = None
+
+
+def _init_worker(vectorizer_path, jd_texts):
+    """Loads the frozen vectorizer and JD vectors once per worker process."""
+    global _VECTORIZER, _JD_MATRIX
+    _VECTORIZER = joblib.load(vectorizer_path)
+    _JD_MATRIX = _VECTORIZER.transform([clean_text(t) for t in jd_texts])
+
+
+def _similarity(vectorizer, cv_texts, jd_matrix):
+    cv_matrix = vectorizer.transform([clean_text(t) for t in cv_texts])
+    return cosine_similarity(cv_matrix, jd_matrix)
+
+
+def _score_chunk(cv_texts):
+    return _similarity(_VECTORIZER, cv_texts, _JD_MATRIX)
+
+
+def score_cvs(cv_texts, jds, workers=None):
+    """Similarity of each CV text to every JD, as long-format rows (CV order, then JD order)."""
+    jd_texts = jds["description"].tolist()
+    chunks = [cv_texts[i:i + CHUNK_SIZE] for i in range(0, len(cv_texts), CHUNK_SIZE)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(VECTORIZER_PATH, jd_texts)) as pool:
+        scores = list(pool.map(_score_chunk, chunks))
+    return [row for chunk in scores for row in chunk]
+
+
+def to_store_rows(candidate_ids, similarity_rows, jds):
+    jd_ids = jds["jd_id"].tolist()
+    return pd.DataFrame({
+        "CV_ID": [cid for cid in candidate_ids for _ in jd_ids],
+        "JD_ID": jd_ids * len(candidate_ids),
+        "similarity_score": [score for row in similarity_rows for score in row]
+    })
+
+
+def jd_fingerprint(jd_ids, jd_texts):
+    """Changes whenever a JD is added, removed or reworded, i.e. whenever stored scores go stale."""
+    parts = [f"{jd_id}\x1e{text}" for jd_id, text in zip(jd_ids, jd_texts)]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def store_is_current(jd_ids, jd_texts):
+    if not all(os.path.exists(p) for p in [SIMILARITY_STORE_PATH, VECTORIZER_PATH, STORE_JDS_PATH]):
+        return False
+    with open(STORE_JDS_PATH, "r", encoding="utf-8") as f:
+        return f.read().strip() == jd_fingerprint(jd_ids, jd_texts)
+
+
+def stored_similarity(cv_texts, jd_texts, cv_ids, jd_ids, pairs=None):
+    """
+    compute_similarity's long-format frame, read from the similarity store instead of refitting TF-IDF.
+    CVs not in the store yet (added to cvs.csv by hand since the last ingestion) are scored against
+    the frozen vocabulary, so every score comes from the same model.
+    Returns None when there is no store or it was scored against other JDs.
+    """
+    if not store_is_current(jd_ids, jd_texts):
+        return None
+    cv_index, jd_index = pairs if pairs is not None else full_grid(len(cv_ids), len(jd_ids))
+
+    store = pd.read_csv(SIMILARITY_STORE_PATH)
+    cv_positions = pd.Index(cv_ids).get_indexer(store["CV_ID"])
+    jd_positions = pd.Index(jd_ids).get_indexer(store["JD_ID"])
+    known = (cv_positions >= 0) & (jd_positions >= 0)
+    scores = np.full((len(cv_ids), len(jd_ids)), np.nan)
+    scores[cv_positions[known], jd_positions[known]] = store["similarity_score"].to_numpy()[known]
+
+    missing = np.unique(cv_index[np.isnan(scores[cv_index, jd_index])])
+    if len(missing):
+        print(f"⚠️ {len(missing)} CVs are not in {SIMILARITY_STORE_PATH} yet; run utils.ingest to index them.")
+        vectorizer = joblib.load(VECTORIZER_PATH)
+        jd_matrix = vectorizer.transform([clean_text(t) for t in jd_texts])
+        scores[missing] = _similarity(vectorizer, [cv_texts[i] for i in missing], jd_matrix)
+
+    return pd.DataFrame({
+        "CV_ID": np.asarray(cv_ids)[cv_index],
+        "JD_ID": np.asarray(jd_ids)[jd_index],
+        "similarity_score": scores[cv_index, jd_index]
+    })
+
+
+# --- 3. Atomic writes ---
+
+def append_csv(path, df):
+    """Appends rows with a single write + fsync; a crash mid-batch is undone by rollback_incomplete_batch."""
+    write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+    data = df.to_csv(index=False, header=write_header)
+    if not write_header:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":  # e.g. a hand-edited cvs.csv without a final newline
+                data = "\n" + data
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def replace_file(path, data):
+    """Writes a whole file through a temp file + os.replace, so readers see the old or the new one."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_corpus_version(row_count):
+    """Running API workers reload CVs when this count grows."""
+    replace_file(CORPUS_VERSION_PATH, str(row_count))
+
+
+def begin_batch(paths):
+    """Records each file's size before the batch appends to it."""
+    sizes = {path: os.path.getsize(path) if os.path.exists(path) else 0 for path in paths}
+    replace_file(JOURNAL_PATH, json.dumps(sizes))
+
+
+def commit_batch():
+    os.remove(JOURNAL_PATH)
+
+
+def rollback_incomplete_batch():
+    """If a previous batch crashed before commit_batch, truncates its files back to their pre-batch sizes."""
+    if not os.path.exists(JOURNAL_PATH):
+        return
+    with open(JOURNAL_PATH, "r", encoding="utf-8") as f:
+        sizes = json.load(f)
+    for path, size in sizes.items():
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            with open(path, "r+b") as f:
+                f.truncate(size)
+                f.flush()
+                os.fsync(f.fileno())
+    commit_batch()
+    print("♻️ Rolled back an incomplete ingestion batch.")
+
+
+# --- 4. Bootstrap (one-off) & ingestion ---
+
+def bootstrap(jds, workers=None):
+    """
+    Freezes the vocabulary and builds the similarity store and hash index from the current
+    corpus. Runs when there is no store yet or the JDs changed since it was scored; later
+    batches just append. The JD fingerprint is written last, so an interrupted bootstrap
+    simply runs again.
+    """
+    cvs = pd.read_csv(CVS_PATH)
+    if os.path.exists(SIMILARITY_STORE_PATH):
+        print(f"🔁 {JDS_PATH} changed since the similarity store was built; rescoring {len(cvs)} CVs...")
+    else:
+        print(f"🧱 Bootstrapping similarity store from {len(cvs)} existing CVs...")
+
+    vectorizer = TfidfVectorizer()
+    vectorizer.fit([clean_text(t) for t in cvs["skills"].tolist() + jds["description"].tolist()])
+    joblib.dump(vectorizer, VECTORIZER_PATH)
+
+    similarity_rows = score_cvs(cvs["skills"].tolist(), jds, workers)
+    replace_file(HASH_INDEX_PATH, pd.DataFrame({
+        "content_hash": [content_hash(r) for r in cvs.to_dict("records")],
+        "candidate_id": cvs["candidate_id"]
+    }).to_csv(index=False))
+    replace_file(SIMILARITY_STORE_PATH, to_store_rows(cvs["candidate_id"].tolist(), similarity_rows, jds).to_csv(index=False))
+    replace_file(STORE_JDS_PATH, jd_fingerprint(jds["jd_id"].tolist(), jds["description"].tolist()))
+
+
+def ingest(records, workers=None):
+    """
+    Adds new CV records to cvs.csv and the similarity store, skipping duplicates.
+    cvs.csv is the source of truth for IDs and the corpus version; rows added to it by
+    hand since the last run are hashed and scored here too.
+    Returns: number of CVs appended
+    """
+    with open(LOCK_PATH, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)  # One ingestion at a time; API workers only read
+
+        rollback_incomplete_batch()
+        jds = pd.read_csv(JDS_PATH)
+        if not store_is_current(jds["jd_id"].tolist(), jds["description"].tolist()):
+            bootstrap(jds, workers)
+
+        cvs = pd.read_csv(CVS_PATH)
+        hash_index = pd.read_csv(HASH_INDEX_PATH)
+        untracked = cvs[~cvs["candidate_id"].isin(hash_index["candidate_id"])]
+        untracked_hashes = [content_hash(r) for r in untracked.to_dict("records")]
+
+        seen = set(hash_index["content_hash"]) | set(untracked_hashes)
+        new_cvs = to_corpus_rows(records)
+        new_hashes = []
+        keep = []
+        for row in new_cvs.to_dict("records"):
+            row_hash = content_hash(row)
+            keep.append(row_hash not in seen)
+            if keep[-1]:
+                seen.add(row_hash)
+                new_hashes.append(row_hash)
+        new_cvs = new_cvs.loc[np.array(keep, dtype=bool)]
+        skipped = len(records) - len(new_cvs)
+
+        next_id = int(cvs["candidate_id"].max()) + 1 if len(cvs) else 1
+        new_cvs.insert(0, "candidate_id", range(next_id, next_id + len(new_cvs)))
+
+        # Hand-added rows are scored with the new ones but already live in cvs.csv
+        to_score = pd.concat([untracked[["candidate_id", "skills"]], new_cvs[["candidate_id", "skills"]]], ignore_index=True)
+        if len(to_score):
+            to_score["skills"] = to_score["skills"].fillna("").astype(str)
+            similarity_rows = score_cvs(to_score["skills"].tolist(), jds, workers)
+
+            begin_batch([SIMILARITY_STORE_PATH, CVS_PATH, HASH_INDEX_PATH])
+            append_csv(SIMILARITY_STORE_PATH, to_store_rows(to_score["candidate_id"].tolist(), similarity_rows, jds))
+            if len(new_cvs):
+                append_csv(CVS_PATH, new_cvs)
+            append_csv(HASH_INDEX_PATH, pd.DataFrame({
+                "content_hash": untracked_hashes + new_hashes,
+                "candidate_id": to_score["candidate_id"]
+            }))
+            commit_batch()
+
+        # Workers only see the new rows once the version file moves
+        write_corpus_version(len(cvs) + len(new_cvs))
+
+    if len(untracked):
+        print(f"🔗 Indexed {len(untracked)} CVs added to {CVS_PATH} by hand.")
+    if len(new_cvs):
+        print(f"✅ Ingested {len(new_cvs)} CVs ({skipped} duplicates skipped).")
+    else:
+        print(f"⚠️ No new CVs to ingest ({skipped} duplicates skipped).")
+    return len(new_cvs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest new CVs into the corpus and similarity store.")
+    parser.add_argument("source", help="Directory of *.txt CVs, an NDJSON file, or '-' for NDJSON on stdin")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.source == "-":
+        records = read_ndjson(sys.stdin)
+    elif os.path.isdir(args.source):
+        records = read_text_dir(args.source)
+    else:
+        with open(args.source, "r", encoding="utf-8") as f:
+            records = read_ndjson(f)
+
+    ingest(records, args.workers)
+
+
+if __name__ == "__main__":
+    main()
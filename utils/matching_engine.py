@@ -1,26 +1,39 @@
+import numpy as np
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from utils.preprocess import clean_text
+from utils.eligibility import full_grid
 import joblib
 
-def compute_similarity(cv_texts, jd_texts):
+def compute_similarity(cv_texts, jd_texts, cv_ids=None, jd_ids=None, pairs=None):
+    # pairs: optional (cv_positions, jd_positions), e.g. from EligibilityIndex.eligible_pairs;
+    # only those pairs are scored. The vocabulary and IDF always come from the whole CV pool,
+    # so a pair's score does not depend on which other pairs were pruned.
+    cv_index, jd_index = pairs if pairs is not None else full_grid(len(cv_texts), len(jd_texts))
+    scored_cvs = np.unique(cv_index)
+
     all_docs = cv_texts + jd_texts
     vectorizer = TfidfVectorizer()
     tfidf_matrix = vectorizer.fit_transform(all_docs)
 
-    cv_vectors = tfidf_matrix[:len(cv_texts)]
+    cv_vectors = tfidf_matrix[:len(cv_texts)][scored_cvs]
     jd_vectors = tfidf_matrix[len(cv_texts):]
 
-    similarity = cosine_similarity(cv_vectors, jd_vectors)
+    # Rows are L2-normalised, so the dot product is the cosine similarity; one dense
+    # (scored CVs × JDs) block, then the requested pairs are gathered from it
+    cv_rows = np.searchsorted(scored_cvs, cv_index)
+    similarity = (cv_vectors @ jd_vectors.T).toarray()[cv_rows, jd_index]
     joblib.dump(vectorizer, "models/tfidf_model.pkl")
 
-    results = []
-    for i, cv in enumerate(cv_texts):
-        for j, jd in enumerate(jd_texts):
-            results.append({
-                "CV_ID": f"CV{i+1}",
-                "JD_ID": f"JD{j+1}",
-                "similarity_score": similarity[i][j]
-            })
-    return pd.DataFrame(results)
+    # Default to positional IDs (CV1, JD1, ...) when the caller has no real ones
+    if cv_ids is None:
+        cv_ids = [f"CV{i+1}" for i in range(len(cv_texts))]
+    if jd_ids is None:
+        jd_ids = [f"JD{j+1}" for j in range(len(jd_texts))]
+
+    # Long format: one row per scored CV x JD pair
+    return pd.DataFrame({
+        "CV_ID": np.asarray(cv_ids)[cv_index],
+        "JD_ID": np.asarray(jd_ids)[jd_index],
+        "similarity_score": similarity
+    })
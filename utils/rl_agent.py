@@ -1,13 +1,22 @@
+import os
+import joblib
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
 from textblob import TextBlob # Simple sentiment analysis
+from utils.eligibility import EligibilityIndex, full_grid
+from utils.ingest import VECTORIZER_PATH
+from utils.preprocess import clean_text
 
 # --- 1. CONFIGURATION ---
 ALPHA = 0.1     # Learning rate
 GAMMA = 0.6     # Discount factor
 EPSILON = 0.1   # Exploration rate (used by choose_action to simulate training decision)
 NUM_ACTIONS = 3 # 0: accept, 1: reject, 2: reconsider
+ACTIONS = ['accept', 'reject', 'reconsider']
+BATCH_EPOCHS = 10 # Sweeps over the aggregated pair rewards in train_rl_agent
+MATCH_COVERAGE = 0.2 # Share of a JD's keywords a CV must cover for 'accept' to pay off
 
 # Discrete levels for state features 
 MATCH_THRESHOLDS = [0.2, 0.5] # For Match Score
@@ -24,6 +33,11 @@ def calculate_match_score(cv_text, jd_text, vectorizer):
     # Cosine similarity calculation
     return np.dot(tfidf_matrix[0].toarray(), tfidf_matrix[1].toarray().T)[0][0]
 
+def frozen_match_score(cv_text, jd_text, vectorizer):
+    """Cosine similarity against the ingestion job's frozen vocabulary: the same score as the similarity store."""
+    cv_vector, jd_vector = vectorizer.transform([clean_text(cv_text), clean_text(jd_text)])
+    return float(cosine_similarity(cv_vector, jd_vector)[0, 0])
+
 def discretize_state(match_score, sentiment_score, prev_reward, reconsideration_count):
     """Converts continuous features to discrete levels for the Q-Table index."""
     
@@ -51,14 +65,79 @@ def discretize_state(match_score, sentiment_score, prev_reward, reconsideration_
     
     return (match_level, sentiment_level, prev_reward_level, history_level)
 
+def discretize_states(match_scores, sentiment_scores):
+    """
+    Vectorised discretize_state for a batch of pairs with no feedback history yet
+    (prev_reward = 0, reconsideration_count = 0).
+    Returns a tuple of index arrays usable directly on the Q-table.
+    """
+    match_levels = np.digitize(np.asarray(match_scores, dtype=float), MATCH_THRESHOLDS)
+    sentiment_levels = np.digitize(np.asarray(sentiment_scores, dtype=float), SENTIMENT_THRESHOLDS)
+    prev_reward_levels = np.ones_like(match_levels)
+    history_levels = np.zeros_like(match_levels)
+    return (match_levels, sentiment_levels, prev_reward_levels, history_levels)
+
+def compute_pair_rewards(cv_texts, jd_texts, pairs=None):
+    """
+    Rewards for CV x JD pairs from token-set overlap, shape (n_pairs, NUM_ACTIONS).
+    pairs: optional (cv_positions, jd_positions); defaults to every pair, CV-major,
+    matching the row order of compute_similarity's output.
+    """
+    if pairs is None:
+        pairs = full_grid(len(cv_texts), len(jd_texts))
+    cv_index, jd_index = pairs
+    scored_cvs = np.unique(cv_index)
+
+    # Binary keyword sets are built once per document; the overlaps of the scored CVs with every JD
+    # are one sparse product, from which the requested pairs are gathered.
+    # Word tokens without stop words, so 'Docker,' in a skills list matches 'Docker' in a JD.
+    vectorizer = CountVectorizer(binary=True, stop_words='english')
+    jd_tokens = vectorizer.fit_transform(jd_texts)
+    cv_tokens = vectorizer.transform([cv_texts[i] for i in scored_cvs])
+
+    cv_rows = np.searchsorted(scored_cvs, cv_index)
+    overlap = (cv_tokens @ jd_tokens.T).toarray()[cv_rows, jd_index]
+    jd_sizes = np.maximum(np.asarray(jd_tokens.sum(axis=1)).ravel(), 1)
+    coverage = overlap / jd_sizes[jd_index] # Share of the JD's tokens present in the CV
+
+    # +1 at twice MATCH_COVERAGE or more, 0 at MATCH_COVERAGE, -1 with no overlap
+    accept_reward = np.clip((coverage - MATCH_COVERAGE) / MATCH_COVERAGE, -1, 1)
+    rewards = np.zeros((coverage.size, NUM_ACTIONS))
+    rewards[:, 0] = accept_reward  # accept pays off when the CV covers enough of the JD
+    rewards[:, 1] = -accept_reward # reject pays off when it does not
+    # reconsider stays at a neutral 0, as in calculate_reward
+    return rewards
+
+def train_rl_agent(match_scores, sentiment_scores, rewards, agent=None, epochs=BATCH_EPOCHS):
+    """
+    Batch entry point: trains an RLAgent on every CV x JD pair at once.
+    match_scores / sentiment_scores: arrays of shape (n_pairs,)
+    rewards: array of shape (n_pairs, NUM_ACTIONS), e.g. from compute_pair_rewards
+    agent: optional RLAgent to train (its history records one entry per epoch)
+    Returns: the trained Q-table
+    """
+    if agent is None:
+        agent = RLAgent()
+    return agent.batch_update(match_scores, sentiment_scores, rewards, epochs)
+
+def greedy_actions(q_table, match_scores, sentiment_scores):
+    """Best action name per pair under the Q-table; None where the state was never trained."""
+    q_values = q_table[discretize_states(match_scores, sentiment_scores)]
+    actions = np.array(ACTIONS, dtype=object)[q_values.argmax(axis=1)]
+    return np.where(np.any(q_values != 0, axis=1), actions, None)
+
 # --- 3. RL Agent Class ---
 
 class RLAgent:
-    def __init__(self, cvs_path, jds_path):
-        # Load Data
-        self.cvs = pd.read_csv(cvs_path)
-        self.jds = pd.read_csv(jds_path)
+    def __init__(self, cvs_path=None, jds_path=None):
+        # Load Data (batch training via train_rl_agent needs no CSVs)
+        self.cvs = pd.read_csv(cvs_path) if cvs_path else pd.DataFrame()
+        self.jds = pd.read_csv(jds_path) if jds_path else pd.DataFrame()
         self.vectorizer = TfidfVectorizer(stop_words='english', max_features=100)
+        # Frozen vocabulary from utils.ingest, when it has run: scoring a pair is a transform, not a refit
+        self.frozen_vectorizer = joblib.load(VECTORIZER_PATH) if cvs_path and os.path.exists(VECTORIZER_PATH) else None
+        # Structured pre-filter (min years / education / locations declared in jds.csv)
+        self.eligibility = EligibilityIndex(self.cvs, self.jds) if cvs_path and jds_path else None
         
         # Q-Table dimensions: 3 (Match) x 3 (Sentiment) x 3 (Reward) x 2 (History) x 3 (Action)
         state_space_size = (3, 3, 3, 2)
@@ -74,10 +153,17 @@ class RLAgent:
     def get_state(self, candidate_id, jd_id, comment):
         """Calculates and discretizes the current State for a pair."""
         
-        # 1. Get Text & Compute Match Score (using 'skills' and 'description' as confirmed)
-        cv_text = self.cvs[self.cvs['candidate_id'] == candidate_id]['skills'].iloc[0]
-        jd_text = self.jds[self.jds['jd_id'] == jd_id]['description'].iloc[0]
-        match_score = calculate_match_score(cv_text, jd_text, self.vectorizer)
+        # 1. Get Text & Compute Match Score (using 'skills' and 'description' as confirmed);
+        #    pairs failing the JD's structured requirements score 0 without any TF-IDF work
+        if self.eligibility is not None and not self.eligibility.is_eligible(candidate_id, jd_id):
+            match_score = 0.0
+        else:
+            cv_text = self.cvs[self.cvs['candidate_id'] == candidate_id]['skills'].iloc[0]
+            jd_text = self.jds[self.jds['jd_id'] == jd_id]['description'].iloc[0]
+            if self.frozen_vectorizer is not None:
+                match_score = frozen_match_score(cv_text, jd_text, self.frozen_vectorizer)
+            else:
+                match_score = calculate_match_score(cv_text, jd_text, self.vectorizer)
 
         # 2. Get Sentiment Score from the latest feedback comment
         sentiment_score = TextBlob(comment).sentiment.polarity
@@ -178,8 +264,49 @@ class RLAgent:
         # ---------------------------------------
 
         print(f"\n--- RL Update for Pair ({candidate_id}, {jd_id}) ---")
-        print(f"S: {s_tuple}, A: {action_taken} ('{['accept','reject','reconsider'][action_taken]}'), R: {reward}")
+        print(f"S: {s_tuple}, A: {action_taken} ('{ACTIONS[action_taken]}'), R: {reward}")
         print(f"Q-Table update: Q{s_index + (action_taken,)} from {old_q:.4f} to {new_q:.4f}")
         print("------------------------------------------------------")
         
         return self.q_table
+
+    def batch_update(self, match_scores, sentiment_scores, rewards, epochs=BATCH_EPOCHS):
+        """
+        Vectorised Q-learning over a batch of pairs.
+        Pair rewards are averaged per discretized state, so each epoch is a single
+        array update over the Q-table regardless of how many pairs were given.
+        Each epoch appends to self.history the mean per-pair reward of the greedy policy
+        it started from.
+        """
+        state_shape = self.q_table.shape[:-1]
+        num_states = int(np.prod(state_shape))
+        flat_states = np.ravel_multi_index(discretize_states(match_scores, sentiment_scores), state_shape)
+
+        rewards = np.asarray(rewards, dtype=float)
+        counts = np.bincount(flat_states, minlength=num_states)
+        reward_sums = np.stack(
+            [np.bincount(flat_states, weights=rewards[:, a], minlength=num_states) for a in range(NUM_ACTIONS)],
+            axis=1
+        )
+        visited = counts > 0
+        mean_rewards = reward_sums[visited] / counts[visited, None]
+
+        # Same update rule as update_reward, with S' = S (no feedback changes the state in batch mode)
+        q = self.q_table.reshape(num_states, NUM_ACTIONS)
+        state_weights = counts[visited] / counts[visited].sum()
+        for epoch in range(epochs):
+            old_q = q[visited]
+            greedy_rewards = mean_rewards[np.arange(len(old_q)), old_q.argmax(axis=1)]
+            epoch_reward = float(np.dot(state_weights, greedy_rewards))
+            self.total_reward_over_time += epoch_reward
+            self.history.append({
+                'epoch': epoch,
+                'reward': epoch_reward,
+                'cumulative_reward': self.total_reward_over_time
+            })
+
+            next_max_q = old_q.max(axis=1, keepdims=True)
+            q[visited] = old_q + ALPHA * (mean_rewards + GAMMA * next_max_q - old_q)
+        self.q_table = q.reshape(self.q_table.shape)
+
+        return self.q_table
@@ -1,14 +1,168 @@
 from textblob import TextBlob
+from contextlib import contextmanager
+import fcntl
+import os
+import numpy as np
 import pandas as pd
 
 def analyze_sentiment(feedback_df):
+    # feedbacks.csv stores the text under 'comment'; older exports used 'feedback'
+    text_col = 'feedback' if 'feedback' in feedback_df.columns else 'comment'
     sentiments = []
     for _, row in feedback_df.iterrows():
-        polarity = TextBlob(row['feedback']).sentiment.polarity
-        label = "Positive" if polarity > 0 else "Negative" if polarity < 0 else "Neutral"
+        polarity = feedback_polarity(row[text_col])
         sentiments.append({
             "candidate_id": row['candidate_id'],
-            "sentiment": label,
-            "polarity": round(polarity, 3)
+            "jd_id": row.get('jd_id'),
+            "sentiment": polarity_label(polarity),
+            "polarity": polarity
         })
     return pd.DataFrame(sentiments)
+
+def feedback_polarity(text):
+    return round(TextBlob(text).sentiment.polarity, 3)
+
+def polarity_label(polarity):
+    return "Positive" if polarity > 0 else "Negative" if polarity < 0 else "Neutral"
+
+
+class SentimentIndex:
+    """
+    Pre-aggregated polarity per (candidate_id, jd_id) pair and per candidate_id:
+    mean, latest and count. Its size is bounded by the number of pairs/candidates with
+    feedback, not by the number of feedbacks, so joins against it stay 1:1.
+    last_feedback_id marks how far into the feedback log (feedbacks.csv) it has absorbed.
+    """
+
+    def __init__(self):
+        # key -> [polarity_sum, count, latest_polarity]
+        self.pairs = {}
+        self.candidates = {}
+        self.last_feedback_id = 0
+
+    @staticmethod
+    def _merge(stats, key, polarity_sum, count, latest):
+        entry = stats.setdefault(key, [0.0, 0, 0.0])
+        entry[0] += polarity_sum
+        entry[1] += count
+        entry[2] = latest
+
+    def update(self, candidate_id, jd_id, polarity):
+        """Adds one new feedback polarity as it arrives (app.py /update_feedback)."""
+        if jd_id is not None and not pd.isna(jd_id):
+            self._merge(self.pairs, (candidate_id, jd_id), polarity, 1, polarity)
+        self._merge(self.candidates, candidate_id, polarity, 1, polarity)
+
+    def add_sentiment(self, sentiment_df):
+        """Bulk update from analyze_sentiment output (rows in arrival order)."""
+        if sentiment_df is None or sentiment_df.empty:
+            return self
+        by_candidate = sentiment_df.groupby("candidate_id", sort=False)["polarity"].agg(["sum", "count", "last"])
+        for candidate_id, polarity_sum, count, latest in by_candidate.itertuples(name=None):
+            self._merge(self.candidates, candidate_id, polarity_sum, count, latest)
+
+        if "jd_id" in sentiment_df.columns:
+            # groupby drops rows without a jd_id; those only count towards the candidate stats
+            by_pair = sentiment_df.groupby(["candidate_id", "jd_id"], sort=False)["polarity"].agg(["sum", "count", "last"])
+            for pair_key, polarity_sum, count, latest in by_pair.itertuples(name=None):
+                self._merge(self.pairs, pair_key, polarity_sum, count, latest)
+        return self
+
+    def absorb_feedback_log(self, feedback_df):
+        """Adds the feedback log rows after last_feedback_id (by their feedback_id); returns how many."""
+        if feedback_df is None or feedback_df.empty:
+            return 0
+        new_rows = feedback_df[feedback_df["feedback_id"] > self.last_feedback_id]
+        if not new_rows.empty:
+            self.add_sentiment(analyze_sentiment(new_rows))
+            self.last_feedback_id = int(new_rows["feedback_id"].max())
+        return len(new_rows)
+
+    @staticmethod
+    def _to_frame(stats, key_names):
+        rows = [(*(key if isinstance(key, tuple) else (key,)), s / n, latest, n)
+                for key, (s, n, latest) in stats.items()]
+        return pd.DataFrame(rows, columns=key_names + ["mean_polarity", "latest_polarity", "feedback_count"])
+
+    def pair_frame(self):
+        return self._to_frame(self.pairs, ["candidate_id", "jd_id"])
+
+    def candidate_frame(self):
+        return self._to_frame(self.candidates, ["candidate_id"])
+
+    def lookup(self, candidate_ids, jd_ids):
+        """
+        Mean polarity for each (candidate_id, jd_id) pair, one value per input pair.
+        Falls back to the candidate's overall mean when that pair has no feedback; NaN if neither.
+        """
+        candidate_ids = pd.Series(np.asarray(candidate_ids))
+        polarity = np.full(len(candidate_ids), np.nan)
+        if self.pairs:
+            pair_mean = pd.Series([s / n for s, n, _ in self.pairs.values()],
+                                  index=pd.MultiIndex.from_tuples(list(self.pairs.keys())))
+            polarity = pair_mean.reindex(pd.MultiIndex.from_arrays([candidate_ids, np.asarray(jd_ids)])).to_numpy()
+
+        candidate_mean = {key: s / n for key, (s, n, _) in self.candidates.items()}
+        fallback = candidate_ids.map(candidate_mean).to_numpy(dtype=float)
+        return np.where(np.isnan(polarity), fallback, polarity)
+
+    # --- Persistence: one CSV, pair rows plus candidate rows (blank jd_id), ---
+    # --- after a "# last_feedback_id=N" line                                ---
+
+    def save(self, path):
+        """
+        Writes the index through a temp file + os.replace, so readers never see a partial file.
+        Hold locked(path) from load to save when other processes may update the same file.
+        """
+        rows = [(cid, jd_id, s, n, latest) for (cid, jd_id), (s, n, latest) in self.pairs.items()]
+        rows += [(cid, None, s, n, latest) for cid, (s, n, latest) in self.candidates.items()]
+        frame = pd.DataFrame(rows, columns=["candidate_id", "jd_id", "polarity_sum", "feedback_count", "latest_polarity"], dtype=object)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(f"# last_feedback_id={self.last_feedback_id}\n")
+            frame.to_csv(f, index=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Index saved by save(); an empty index if the file does not exist yet."""
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        with open(path, "r", encoding="utf-8") as f:
+            watermark = f.readline()
+            if watermark.startswith("# last_feedback_id="):
+                index.last_feedback_id = int(watermark.split("=", 1)[1])
+            else:
+                f.seek(0)  # Written before the watermark line existed: the feedback log is absorbed again
+            frame = pd.read_csv(f)
+        is_pair = frame["jd_id"].notna()
+        pair_rows, candidate_rows = frame[is_pair].copy(), frame[~is_pair].drop(columns="jd_id")
+        if pair_rows["jd_id"].dtype.kind == "f" and (pair_rows["jd_id"] % 1 == 0).all():
+            pair_rows["jd_id"] = pair_rows["jd_id"].astype("int64")  # Blank candidate rows made the column float
+
+        for cid, jd_id, polarity_sum, count, latest in pair_rows.itertuples(index=False, name=None):
+            index.pairs[(cid, jd_id)] = [polarity_sum, int(count), latest]
+        for cid, polarity_sum, count, latest in candidate_rows.itertuples(index=False, name=None):
+            index.candidates[cid] = [polarity_sum, int(count), latest]
+        return index
+
+
+@contextmanager
+def locked(path):
+    """Exclusive lock for a load → update → save of the index at path, across processes."""
+    with open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def record_feedback(path, candidate_id, jd_id, polarity):
+    """
+    Adds one feedback to the saved index. The file is reloaded under the lock, so concurrent
+    API workers never overwrite each other's updates. Returns the updated index.
+    """
+    with locked(path):
+        index = SentimentIndex.load(path)
+        index.update(candidate_id, jd_id, polarity)
+        index.save(path)
+    return index
@@ -1,49 +1,121 @@
-import matplotlib.pyplot as plt
+import threading
+import matplotlib
+matplotlib.use("Agg")  # Non-interactive backend: reports are rendered to PNG only
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import seaborn as sns
 import pandas as pd
 import numpy as np
 
-# ---------- 1️⃣ CV–JD Similarity Heatmap ----------
-def plot_similarity_heatmap(match_df):
-    pivot = match_df.pivot(index="CV_ID", columns="JD_ID", values="similarity_score")
-    plt.figure(figsize=(6, 4))
-    sns.heatmap(pivot, annot=True, cmap="Blues", fmt=".2f")
-    plt.title("CV–JD Similarity Heatmap")
-    plt.tight_layout()
-    plt.savefig("data/similarity_heatmap.png")
-    plt.close()
+TOP_K_PER_JD = 10        # CVs kept per JD in the heatmap
+SCORE_BINS = 50          # Similarity score bins in the density plot
+MAX_REWARD_POINTS = 2000 # Reward curve is downsampled to at most this many points
+MAX_ANNOTATED_CELLS = 200
+MAX_FIGURE_INCHES = 20   # Cap on either side of a figure, however many CVs/JDs are drawn
 
+# Figures are built with the object API (no pyplot global state), so rendering
+# is safe to run from the background worker in start_plot_worker.
+def _new_figure(width, height):
+    """Figure with an Agg canvas attached; without one, seaborn's tick sizing is very memory-hungry."""
+    fig = Figure(figsize=(min(width, MAX_FIGURE_INCHES), min(height, MAX_FIGURE_INCHES)))
+    FigureCanvasAgg(fig)
+    return fig
 
-# ---------- 2️⃣ Sentiment Distribution ----------
+
+# ---------- 1️⃣ CV–JD Similarity Heatmap (Top-K per JD) ----------
+def plot_similarity_heatmap(match_df, top_k=TOP_K_PER_JD):
+    # Only the top_k CVs of each JD are pivoted, so the frame is at most top_k × n_JDs rows
+    top = (match_df.sort_values("similarity_score", ascending=False)
+                   .groupby("JD_ID", sort=False)
+                   .head(top_k))
+    pivot = top.pivot(index="CV_ID", columns="JD_ID", values="similarity_score")
+    pivot = pivot.loc[pivot.max(axis=1).sort_values(ascending=False).index]
+
+    fig = _new_figure(max(6, 0.6 * pivot.shape[1]), max(4, 0.25 * pivot.shape[0]))
+    ax = fig.add_subplot()
+    sns.heatmap(pivot, annot=pivot.size <= MAX_ANNOTATED_CELLS, cmap="Blues", fmt=".2f", ax=ax)
+    ax.set_title(f"CV–JD Similarity Heatmap (Top {top_k} CVs per JD)")
+    fig.tight_layout()
+    fig.savefig("data/similarity_heatmap.png")
+
+
+# ---------- 2️⃣ Similarity Score Density (Binned per JD) ----------
+def plot_score_density(match_df, bins=SCORE_BINS):
+    # Counts per (JD, score bin) instead of one point per pair
+    jd_codes, jd_labels = pd.factorize(match_df["JD_ID"], sort=True)
+    counts, _, score_edges = np.histogram2d(
+        jd_codes, match_df["similarity_score"].to_numpy(),
+        bins=[np.arange(len(jd_labels) + 1) - 0.5, np.linspace(0, 1, bins + 1)]
+    )
+
+    fig = _new_figure(8, max(4, 0.3 * len(jd_labels)))
+    ax = fig.add_subplot()
+    image = ax.imshow(np.log1p(counts), aspect="auto", origin="lower", cmap="viridis",
+                      extent=[score_edges[0], score_edges[-1], -0.5, len(jd_labels) - 0.5])
+    ax.set_yticks(range(len(jd_labels)))
+    ax.set_yticklabels(jd_labels)
+    ax.set_title("Similarity Score Density per JD")
+    ax.set_xlabel("Similarity Score")
+    ax.set_ylabel("JD_ID")
+    fig.colorbar(image, ax=ax, label="log(1 + CV count)")
+    fig.tight_layout()
+    fig.savefig("data/score_density.png")
+
+
+# ---------- 3️⃣ Sentiment Distribution (one label per candidate) ----------
 def plot_sentiment_distribution(sentiment_df):
     counts = sentiment_df["sentiment"].value_counts()
-    plt.figure(figsize=(5, 4))
-    counts.plot(kind="pie", autopct="%1.1f%%", startangle=90, colors=["lightgreen", "lightcoral", "lightblue"])
-    plt.title("Feedback Sentiment Distribution")
-    plt.ylabel("")
-    plt.tight_layout()
-    plt.savefig("data/sentiment_pie.png")
-    plt.close()
-
-
-# ---------- 3️⃣ RL Reward Trend (Mock Visualization) ----------
-def plot_rl_rewards(episodes=50):
-    rewards = np.random.uniform(-1, 1, episodes).cumsum()
-    plt.figure(figsize=(6, 4))
-    plt.plot(range(episodes), rewards, marker="o")
-    plt.title("RL Agent Reward Tracking")
-    plt.xlabel("Episodes")
-    plt.ylabel("Cumulative Reward")
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig("data/rl_rewards.png")
-    plt.close()
-
-
-# ---------- 4️⃣ Combined Overview ----------
-def generate_all_plots(match_df, sentiment_df):
+    fig = _new_figure(5, 4)
+    ax = fig.add_subplot()
+    counts.plot(kind="pie", autopct="%1.1f%%", startangle=90, colors=["lightgreen", "lightcoral", "lightblue"], ax=ax)
+    ax.set_title("Candidate Sentiment Distribution")
+    ax.set_ylabel("")
+    fig.tight_layout()
+    fig.savefig("data/sentiment_pie.png")
+
+
+# ---------- 4️⃣ RL Reward Trend (from RLAgent.history) ----------
+def plot_rl_rewards(history, max_points=MAX_REWARD_POINTS, xlabel="Training Epoch"):
+    rewards = pd.DataFrame(history)["cumulative_reward"].to_numpy()
+    step = max(1, int(np.ceil(len(rewards) / max_points)))
+    episodes = np.arange(0, len(rewards), step)
+
+    fig = _new_figure(6, 4)
+    ax = fig.add_subplot()
+    ax.plot(episodes, rewards[::step], marker="o" if len(episodes) <= 100 else None)
+    ax.set_title("RL Agent Reward Tracking")
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Cumulative Reward")
+    ax.grid(True)
+    fig.tight_layout()
+    fig.savefig("data/rl_rewards.png")
+
+
+# ---------- 5️⃣ Combined Overview ----------
+def generate_all_plots(match_df, sentiment_df, history=None):
     print("📊 Generating visualizations...")
     plot_similarity_heatmap(match_df)
-    plot_sentiment_distribution(sentiment_df)
-    plot_rl_rewards()
+    plot_score_density(match_df)
+    if sentiment_df is not None and not sentiment_df.empty:
+        plot_sentiment_distribution(sentiment_df)
+    if history:
+        plot_rl_rewards(history)
     print("✅ Charts saved in /data as PNG files.")
+
+
+def start_plot_worker(match_df, sentiment_df, history=None):
+    """
+    Renders generate_all_plots in a background thread and returns it.
+    history: RLAgent.history of the agent that produced the decisions, for the reward curve.
+    The thread is non-daemon, so the interpreter still waits for the charts before exiting.
+    """
+    def render():
+        try:
+            generate_all_plots(match_df, sentiment_df, history)
+            print("📊 Visualizations generated successfully")
+        except Exception as e:
+            print(f"❌ Error generating visualizations: {e}")
+
+    worker = threading.Thread(target=render, name="plot-worker")
+    worker.start()
+    return worker